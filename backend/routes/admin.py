@@ -3,7 +3,7 @@ Admin routes for PeerAI API
 """
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import func, desc, case
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
@@ -321,6 +321,16 @@ async def get_analytics(
     }
 
 
+def _settings_response(settings: SystemSettings) -> Response:
+    """Serialize already-validated settings.
+
+    Returning a Response skips FastAPI's response_model pass, which would
+    dump the model to a dict and validate it a second time. response_model
+    stays on the routes for the OpenAPI schema.
+    """
+    return Response(content=settings.model_dump_json(), media_type="application/json")
+
+
 @router.get("/api/v1/admin/settings", response_model=SystemSettings)
 async def get_settings(
     current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
@@ -337,12 +347,14 @@ async def get_settings(
         db.commit()
         db.refresh(settings)
 
-    return SystemSettings(
-        rateLimit=settings.rate_limit,
-        security=settings.security,
-        models=settings.models,
-        monitoring=settings.monitoring,
-        betaFeatures=settings.beta_features,
+    return _settings_response(
+        SystemSettings(
+            rateLimit=settings.rate_limit,
+            security=settings.security,
+            models=settings.models,
+            monitoring=settings.monitoring,
+            betaFeatures=settings.beta_features,
+        )
     )
 
 
@@ -371,9 +383,9 @@ async def update_settings(
     db_settings.updated_by = current_user.id
 
     db.commit()
-    db.refresh(db_settings)
 
-    return settings
+    # The request body was validated on the way in; send it back as is
+    return _settings_response(settings)
 
 
 @router.patch("/api/v1/admin/settings", response_model=SettingsUpdateResponse)
@@ -26,6 +26,14 @@ router = APIRouter(
     tags=["temp-documents"],
 )
 
+# Content types for the document formats we accept, keyed by file extension
+_CONTENT_TYPES_BY_EXTENSION = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".md": "text/markdown",
+}
+
 
 @router.post("/upload", response_model=TempDocumentResponse)
 async def upload_temp_document(
@@ -131,16 +139,28 @@ async def process_temp_documents(
     # Process each file in the directory
     processed_documents = []
 
+    # Permanent uploads directory shared by every file in this session
+    uploads_dir = os.path.join(settings.UPLOAD_DIR, str(current_user.id))
+
+    # Created on the first file moved, so an empty session leaves no directory behind
+    uploads_dir_created = False
+
     try:
-        for filename in os.listdir(temp_uploads_dir):
+        # Snapshot the directory up front since files are moved out while we iterate
+        with os.scandir(temp_uploads_dir) as it:
+            entries = list(it)
+
+        for entry in entries:
+            filename = entry.name
             # Skip metadata files
             if filename.endswith(".metadata"):
                 continue
 
-            file_path = os.path.join(temp_uploads_dir, filename)
-            if os.path.isfile(file_path):
+            file_path = entry.path
+            # The directory entry already carries the file type, so only the size needs a stat
+            if entry.is_file():
                 # Get file info
-                file_size = os.path.getsize(file_path)
+                file_size = entry.stat().st_size
 
                 # Check if we have metadata with the original filename
                 original_filename = filename
@@ -152,21 +172,15 @@ async def process_temp_documents(
                     os.remove(metadata_path)
 
                 # Determine content type based on extension
-                content_type = "application/octet-stream"  # Default
-                if original_filename.endswith(".pdf"):
-                    content_type = "application/pdf"
-                elif original_filename.endswith(".txt"):
-                    content_type = "text/plain"
-                elif original_filename.endswith(".docx"):
-                    content_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                elif original_filename.endswith(".md"):
-                    content_type = "text/markdown"
-
-                # Create permanent uploads directory
-                uploads_dir = os.path.join(settings.UPLOAD_DIR, str(current_user.id))
-                os.makedirs(uploads_dir, exist_ok=True)
+                content_type = _CONTENT_TYPES_BY_EXTENSION.get(
+                    os.path.splitext(original_filename)[1],
+                    "application/octet-stream",  # Default
+                )
 
                 # Move file to permanent location
+                if not uploads_dir_created:
+                    os.makedirs(uploads_dir, exist_ok=True)
+                    uploads_dir_created = True
                 permanent_filename = f"{uuid.uuid4()}{os.path.splitext(filename)[1]}"
                 permanent_path = os.path.join(uploads_dir, permanent_filename)
                 os.rename(file_path, permanent_path)
@@ -99,27 +99,20 @@ def run_alembic_migrations():
             check=False
         )
         
-        # Then run the migrations
+        # Then run the migrations, streaming Alembic's output as it runs
         print("ℹ️ Running migrations...")
-        result = subprocess.run(
+        subprocess.run(
             ["alembic", "upgrade", "head"],
             cwd=str(Path(__file__).parent.parent.parent),
             env=env,
-            check=True,
-            capture_output=True,
-            text=True
+            check=True
         )
         
-        print(result.stdout)
-        if result.stderr:
-            print(f"⚠️ Warnings: {result.stderr}")
-        
         print("✅ Database migrations completed successfully!")
         return True
     except subprocess.CalledProcessError as e:
+        # Alembic's output and errors have already been streamed above
         print(f"❌ Error running migrations: {e}")
-        print(f"Output: {e.stdout}")
-        print(f"Error: {e.stderr}")
         return False
 
 def main():
@@ -5,7 +5,8 @@ import os
 import re
 import logging
 import asyncio
-from typing import List, Dict, Any
+import functools
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from markdownify import markdownify as md
 import PyPDF2
@@ -20,6 +21,12 @@ logger = logging.getLogger(__name__)
 # Mistral's embedding model has a limit of 8192 tokens
 MAX_TOKENS_PER_CHUNK = 1500
 
+# Sentence boundaries used when splitting text into chunks
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Token count reported by Mistral in token limit errors
+_MISTRAL_TOKEN_COUNT_RE = re.compile(r"has (\d+) tokens")
+
 
 class DocumentProcessor:
     """
@@ -50,9 +57,11 @@ class DocumentProcessor:
 
         # Get file size if available
         file_size = 0
-        if os.path.exists(document.storage_path):
-            file_size = os.path.getsize(document.storage_path)
+        try:
+            file_size = os.stat(document.storage_path).st_size
             logger.info(f"Document file size: {file_size / 1024:.2f} KB")
+        except OSError:
+            pass
 
         try:
             # Extract text from the document
@@ -69,7 +78,7 @@ class DocumentProcessor:
 
             # Split text into chunks
             logger.info(f"Splitting document into chunks (max tokens per chunk: {MAX_TOKENS_PER_CHUNK})")
-            chunks = self._split_text(text)
+            chunks = self._split_text(text, total_tokens=token_count)
             logger.info(f"Document split into {len(chunks)} chunks")
 
             # Generate embeddings for each chunk
@@ -84,7 +93,7 @@ class DocumentProcessor:
                 # The retry logic in _generate_embedding will handle any rate limiting issues
 
                 try:
-                    embedding = await self._generate_embedding(chunk)
+                    embedding = await self._generate_embedding(chunk, token_count=chunk_token_count)
 
                     # Create document chunk
                     chunk_obj = DocumentChunk(
@@ -187,12 +196,12 @@ class DocumentProcessor:
         elif content_type == "application/pdf":
             # For PDF files - use PyPDF2 to extract text
             try:
-                pdf_text = ""
                 with open(file_path, "rb") as pdf_file:
                     pdf_reader = PyPDF2.PdfReader(pdf_file)
-                    for page_num in range(len(pdf_reader.pages)):
-                        page = pdf_reader.pages[page_num]
-                        pdf_text += page.extract_text() + "\n\n"
+                    # Collect page texts and join once instead of growing a string per page
+                    pdf_text = "".join(
+                        page.extract_text() + "\n\n" for page in pdf_reader.pages
+                    )
 
                 # Add a title based on the filename
                 filename = os.path.basename(file_path)
@@ -259,7 +268,7 @@ class DocumentProcessor:
             # Fallback to a rough estimate if tiktoken fails
             return int(len(text.split()) * 1.5)  # Apply safety factor to word count too
 
-    def _split_text(self, text: str, max_tokens_per_chunk: int = MAX_TOKENS_PER_CHUNK, overlap_tokens: int = 50) -> List[str]:
+    def _split_text(self, text: str, max_tokens_per_chunk: int = MAX_TOKENS_PER_CHUNK, overlap_tokens: int = 50, total_tokens: Optional[int] = None) -> List[str]:
         """
         Split text into chunks based on token count.
 
@@ -267,14 +276,16 @@ class DocumentProcessor:
             text: Text to split.
             max_tokens_per_chunk: Maximum number of tokens per chunk.
             overlap_tokens: Number of tokens to overlap between chunks.
+            total_tokens: Token count of the whole text, if the caller already has it.
 
         Returns:
             List[str]: List of text chunks.
         """
         logger.info(f"Splitting text into chunks with max_tokens={max_tokens_per_chunk}, overlap={overlap_tokens}")
 
-        # Get total token count for the entire text
-        total_tokens = self._count_tokens(text)
+        # Get total token count for the entire text, unless the caller already counted it
+        if total_tokens is None:
+            total_tokens = self._count_tokens(text)
         logger.info(f"Total tokens in document: {total_tokens}")
 
         # If text is small enough, return it as a single chunk
@@ -282,8 +293,12 @@ class DocumentProcessor:
             logger.info(f"Document fits in a single chunk ({total_tokens} tokens)")
             return [text]
 
+        # Words repeat heavily within a document, so memoize per-word counts
+        # for the word-level splitting below
+        count_word_tokens = functools.lru_cache(maxsize=8192)(self._count_tokens)
+
         # Split text into sentences first for more natural chunks
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         chunks = []
         current_chunk = []
         current_chunk_tokens = 0
@@ -307,7 +322,7 @@ class DocumentProcessor:
                 current_part_tokens = 0
 
                 for word in words:
-                    word_tokens = self._count_tokens(word)
+                    word_tokens = count_word_tokens(word)
                     if current_part_tokens + word_tokens <= max_tokens_per_chunk:
                         current_part.append(word)
                         current_part_tokens += word_tokens
@@ -377,7 +392,7 @@ class DocumentProcessor:
                 current_piece_tokens = 0
 
                 for word in words:
-                    word_tokens = self._count_tokens(word + " ")
+                    word_tokens = count_word_tokens(word + " ")
                     if current_piece_tokens + word_tokens <= max_tokens_per_chunk:
                         current_piece.append(word)
                         current_piece_tokens += word_tokens
@@ -405,7 +420,7 @@ class DocumentProcessor:
 
         return chunks
 
-    async def _generate_embedding(self, text: str, max_retries: int = 5) -> List[float]:
+    async def _generate_embedding(self, text: str, max_retries: int = 5, token_count: Optional[int] = None) -> List[float]:
         """
         Generate an embedding for a text chunk using the ModelOrchestrator.
         Includes enhanced retry logic for rate limiting with exponential backoff and jitter.
@@ -413,12 +428,14 @@ class DocumentProcessor:
         Args:
             text: Text to generate embedding for.
             max_retries: Maximum number of retries for rate limit errors.
+            token_count: Token count of the text, if the caller already has it.
 
         Returns:
             List[float]: Embedding vector with 1024 dimensions.
         """
-        # Count tokens in the chunk
-        token_count = self._count_tokens(text)
+        # Count tokens in the chunk, unless the caller already counted it
+        if token_count is None:
+            token_count = self._count_tokens(text)
         logger.info(f"Generating embedding for chunk with {token_count} tokens")
 
         # Check if chunk is too large for the embedding model
@@ -523,14 +540,13 @@ class DocumentProcessor:
                 # For token limit errors, extract token count information if possible
                 if "400" in str(e) and "token" in str(e).lower():
                     try:
-                        import re
-                        token_count_match = re.search(r"has (\d+) tokens", str(e))
+                        token_count_match = _MISTRAL_TOKEN_COUNT_RE.search(str(e))
                         if token_count_match:
                             mistral_token_count = int(token_count_match.group(1))
-                            our_token_count = self._count_tokens(text) / 1.15  # Remove our safety factor
+                            our_token_count = token_count / 1.15  # Remove our safety factor
                             discrepancy = (mistral_token_count - our_token_count) / our_token_count * 100
                             logger.warning(f"Token count discrepancy: Mistral counted {mistral_token_count} tokens, " +
-                                          f"we estimated {int(our_token_count)} tokens (raw) or {self._count_tokens(text)} (adjusted). " +
+                                          f"we estimated {int(our_token_count)} tokens (raw) or {token_count} (adjusted). " +
                                           f"Discrepancy: {discrepancy:.2f}%")
                     except Exception as parse_error:
                         logger.error(f"Error parsing token count from error message: {str(parse_error)}")
@@ -0,0 +1,56 @@
+"""Lightweight database session stand-ins for tests that never touch a database.
+
+These replace MagicMock chains such as
+``session.query.return_value.filter.return_value.first.return_value``; plain
+method dispatch on slotted classes avoids allocating a child mock for every
+attribute access along the chain.
+"""
+from typing import Any, Dict
+
+
+class QueryStub:
+    """Query stand-in that always returns one fixed result."""
+
+    __slots__ = ("_result",)
+
+    def __init__(self, result: Any = None):
+        self._result = result
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def first(self):
+        return self._result
+
+
+# Shared by every query for a model nothing was registered for
+_EMPTY_QUERY = QueryStub()
+
+
+class SessionStub:
+    """Stand-in for a SQLAlchemy session.
+
+    ``query(model).filter(...).first()`` returns the result ``register``-ed
+    for that model, or None. Writes are accepted and discarded.
+    """
+
+    __slots__ = ("_queries",)
+
+    def __init__(self):
+        self._queries: Dict[Any, QueryStub] = {}
+
+    def register(self, model: Any, result: Any) -> None:
+        """Return result from every ``query(model)``, whatever the call order."""
+        self._queries[model] = QueryStub(result)
+
+    def query(self, model: Any, *args, **kwargs):
+        return self._queries.get(model, _EMPTY_QUERY)
+
+    def add(self, *args, **kwargs):
+        pass
+
+    def commit(self):
+        pass
+
+    def refresh(self, *args, **kwargs):
+        pass
@@ -1,27 +1,34 @@
 """Test configuration and fixtures."""
+import asyncio
+import functools
+import hashlib
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
-from fastapi.testclient import TestClient
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.schema import CreateIndex, CreateTable
 import os
 import logging
 from datetime import datetime, timedelta
 from jose import jwt
-from typing import List, AsyncGenerator
+from passlib.context import CryptContext
+from contextvars import ContextVar
+from typing import List, Optional
 import httpx
-import pytest_asyncio
-from httpx import AsyncClient
-from starlette.websockets import WebSocket
 
 from backend.main import app
 from backend.database import get_db
 from backend.models.base import Base
 from backend.config import settings
 from backend.models.auth import User, APIKey, DBSystemSettings, Role
-from backend.core.security import get_password_hash
+from backend.core.security import get_password_hash, verify_password
 from backend.models.usage import UsageRecord
 
+from _stubs import SessionStub
+
 # Ensure we're in test environment
 os.environ["ENVIRONMENT"] = "test"
 
@@ -29,17 +36,86 @@ os.environ["ENVIRONMENT"] = "test"
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create test database engine with better isolation
-test_engine = create_engine(
-    settings.TEST_DATABASE_URL, poolclass=StaticPool, isolation_level="SERIALIZABLE"
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+# Fixed far-future expiry for test API keys
+_API_KEY_EXPIRES = datetime(2099, 1, 1)
+
+# Fixed far-future expiry for test tokens, so cached tokens never go stale
+_TOKEN_EXPIRES = datetime(2099, 1, 1)
+
+# Sessions are bound per test to a connection from the engine fixture
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run tests marked slow (real database integration tests)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless --run-slow is given."""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_for_tests(password: str) -> str:
+    """Hash a test password once per session; tests never need fresh salts."""
+    return get_password_hash(password)
+
+
+@pytest.fixture(scope="session")
+def test_password_hash() -> str:
+    """Hash of the shared test password "test123", computed once per session."""
+    return _hash_for_tests("test123")
+
+
+@pytest.fixture(scope="session")
+def mock_user(test_password_hash) -> User:
+    """Unsaved regular user for tests that stub out the database.
+
+    Built once per session; tests only read it, so it is shared.
+    """
+    return User(
+        id=1,
+        email="test@example.com",
+        hashed_password=test_password_hash,  # Password: test123
+        full_name="Test User",
+        is_active=True,
+        role=Role.USER,
+    )
 
 
-def create_test_token(user_id: int, is_superuser: bool = False) -> str:
-    """Create a test JWT token."""
-    expire = datetime.utcnow() + timedelta(minutes=30)
-    to_encode = {"sub": str(user_id), "exp": expire, "is_superuser": is_superuser}
+@pytest.fixture(scope="session")
+def mock_api_key(mock_user) -> APIKey:
+    """Unsaved API key belonging to mock_user."""
+    return APIKey(
+        id=1,
+        key="test_key_123",
+        name="Test Key",
+        user_id=mock_user.id,
+        is_active=True,
+        expires_at=_API_KEY_EXPIRES,
+        daily_limit=1000,
+        minute_limit=60,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def create_test_token(email: str, is_superuser: bool = False) -> str:
+    """Create a test JWT token, signed once per (email, is_superuser) per session."""
+    to_encode = {
+        "sub": email,
+        "exp": _TOKEN_EXPIRES,
+        "is_superuser": is_superuser,
+    }
     token = jwt.encode(
         to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
     )
@@ -49,13 +125,13 @@ def create_test_token(user_id: int, is_superuser: bool = False) -> str:
 @pytest.fixture
 def admin_token(admin_user) -> str:
     """Create a token for admin user."""
-    return create_test_token(admin_user.id, is_superuser=True)
+    return create_test_token(admin_user.email, is_superuser=True)
 
 
 @pytest.fixture
 def user_token(test_user) -> str:
     """Create a token for regular user."""
-    return create_test_token(test_user.id)
+    return create_test_token(test_user.email)
 
 
 @pytest.fixture
@@ -63,10 +139,11 @@ def admin_user(db_session) -> User:
     """Create an admin user."""
     user = User(
         email="admin@peerai.se",
-        hashed_password=get_password_hash("admin123"),
+        hashed_password=_hash_for_tests("admin123"),
         full_name="Admin User",
         is_active=True,
-        is_superuser=True,
+        # is_superuser is read-only and derived from the role
+        role=Role.SUPER_ADMIN,
     )
     db_session.add(user)
     db_session.commit()
@@ -79,7 +156,7 @@ def test_user(db_session) -> User:
     """Create a test user."""
     user = User(
         email="test@peerai.se",
-        hashed_password=get_password_hash("test123"),
+        hashed_password=_hash_for_tests("test123"),
         full_name="Test User",
         is_active=True,
         role=Role.USER,
@@ -98,7 +175,7 @@ def test_api_key(db_session, test_user) -> APIKey:
         name="Test Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_API_KEY_EXPIRES,
         daily_limit=1000,
         minute_limit=60,
     )
@@ -134,44 +211,221 @@ def test_settings(db_session) -> DBSystemSettings:
 @pytest.fixture
 def test_usage_records(db_session, test_user, test_api_key) -> List[UsageRecord]:
     """Create test usage records."""
-    records = []
-    for i in range(10):
-        record = UsageRecord(
-            user_id=test_user.id,
-            api_key_id=test_api_key.id,
-            timestamp=datetime.utcnow() - timedelta(days=i),
-            model="claude-3-sonnet-20240229",  # @note: Model name - do not change
-            endpoint="/completions",
-            tokens_used=100 * (i + 1),
-            latency_ms=200.0,
-            error=i % 3 == 0,  # Every third request is an error
-            error_type="rate_limit_exceeded" if i % 3 == 0 else None,
-            error_message="Rate limit exceeded" if i % 3 == 0 else None,
-            status_code=429 if i % 3 == 0 else 200,
-        )
-        records.append(record)
-
-    db_session.bulk_save_objects(records)
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": test_user.id,
+            "api_key_id": test_api_key.id,
+            "created_at": now - timedelta(days=i),
+            "model": "claude-3-sonnet-20240229",  # @note: Model name - do not change
+            "endpoint": "/completions",
+            "tokens_used": 100 * (i + 1),
+            "latency_ms": 200.0,
+            "error": i % 3 == 0,  # Every third request is an error
+            "error_type": "rate_limit_exceeded" if i % 3 == 0 else None,
+            "error_message": "Rate limit exceeded" if i % 3 == 0 else None,
+            "status_code": 429 if i % 3 == 0 else 200,
+        }
+        for i in range(10)
+    ]
+
+    # Single multi-row INSERT instead of building ORM instances
+    db_session.execute(UsageRecord.__table__.insert(), rows)
     db_session.commit()
-    return records
+    return db_session.scalars(
+        select(UsageRecord)
+        .where(UsageRecord.user_id == test_user.id)
+        .order_by(UsageRecord.created_at.desc())
+    ).all()
 
 
 @pytest.fixture(scope="session", autouse=True)
-def setup_test_database():
-    """Create test database tables."""
+def fast_password_hashing():
+    """Use the minimum bcrypt cost for the test session and cache verifications.
+
+    Hashes stay real bcrypt hashes, so verify_password still works against
+    them, but each hash takes milliseconds instead of the production cost.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            "backend.core.security.pwd_context",
+            CryptContext(schemes=["bcrypt"], bcrypt__rounds=4, deprecated="auto"),
+        )
+        # The suite logs in with the same few credentials over and over, so
+        # verify each (password, hash) pair once. The cache dies with the session.
+        cached_verify = functools.lru_cache(maxsize=64)(verify_password)
+        for module in ("backend.core.security", "backend.routes.auth"):
+            mp.setattr(f"{module}.verify_password", cached_verify)
+        yield
+
+
+# Arbitrary key for the advisory lock that serializes template builds and clones
+_TEMPLATE_LOCK_KEY = 4_242_001
+
+
+def _schema_fingerprint() -> str:
+    """Hash the DDL of every model table, index and enum type so a stale
+    template can be detected."""
+    dialect = postgresql.dialect()
+    statements = []
+    enum_types = {}
+    # Sorted by name: sorted_tables warns about the users/api_keys/teams cycle
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        statements.append(CreateTable(table))
+        statements.extend(
+            CreateIndex(index) for index in sorted(table.indexes, key=lambda i: i.name)
+        )
+        for column in table.columns:
+            column_type = column.type.dialect_impl(dialect)
+            if isinstance(column_type, postgresql.ENUM):
+                enum_types[column_type.name] = column_type
+    statements.extend(
+        postgresql.CreateEnumType(enum_types[name]) for name in sorted(enum_types)
+    )
+    ddl = "\n".join(str(statement.compile(dialect=dialect)) for statement in statements)
+    return hashlib.sha256(ddl.encode()).hexdigest()
+
+
+def _clone_test_database(url: str) -> Optional[str]:
+    """Give this test run a fresh PostgreSQL database cloned from a template.
+
+    The ``<db>_template`` database is built with create_all only when it is
+    missing or the models have changed (tracked by a fingerprint stored as the
+    database comment). The run then gets a ``<db>_run`` database, or one
+    ``<db>_<worker>`` per worker under ``pytest -n auto``, from a cheap
+    ``CREATE DATABASE ... TEMPLATE``. The configured database itself is never
+    dropped.
+
+    Returns the clone's URL, or None for other backends and when the server
+    will not let us clone (no CREATEDB privilege, no access to the
+    maintenance database, a clone still in use).
+    """
+    base_url = make_url(url)
+    if not base_url.drivername.startswith("postgresql"):
+        return None
+
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "run")
+    database = f"{base_url.database}_{worker}"
+    template = f"{base_url.database}_template"
+    fingerprint = _schema_fingerprint()
+
+    # DROP/CREATE DATABASE cannot run while connected to the target, so work
+    # from the maintenance database
+    admin_engine = create_engine(
+        base_url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    try:
+        with admin_engine.connect() as conn:
+            conn.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": _TEMPLATE_LOCK_KEY}
+            )
+            try:
+                row = conn.execute(
+                    text(
+                        "SELECT shobj_description(oid, 'pg_database') "
+                        "FROM pg_database WHERE datname = :name"
+                    ),
+                    {"name": template},
+                ).first()
+                if row is None or row[0] != fingerprint:
+                    if row is not None:
+                        conn.execute(text(f'DROP DATABASE "{template}"'))
+                    conn.execute(text(f'CREATE DATABASE "{template}"'))
+                    template_engine = create_engine(base_url.set(database=template))
+                    try:
+                        Base.metadata.create_all(bind=template_engine)
+                    finally:
+                        template_engine.dispose()
+                    conn.execute(
+                        text(f"COMMENT ON DATABASE \"{template}\" IS '{fingerprint}'")
+                    )
+                    logger.info(f"Built test database template {template}")
+
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{database}"'))
+                conn.execute(
+                    text(f'CREATE DATABASE "{database}" TEMPLATE "{template}"')
+                )
+                logger.info(f"Cloned test database {database} from {template}")
+            finally:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": _TEMPLATE_LOCK_KEY}
+                )
+    except DBAPIError as e:
+        logger.warning(f"Cannot clone the test database, using it directly: {e}")
+        return None
+    finally:
+        admin_engine.dispose()
+    return base_url.set(database=database).render_as_string(hide_password=False)
+
+
+def _drop_test_database(url: str) -> None:
+    """Drop this run's PostgreSQL clone once the session is done with it."""
+    clone_url = make_url(url)
+    admin_engine = create_engine(
+        clone_url.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    try:
+        with admin_engine.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{clone_url.database}"'))
+    finally:
+        admin_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def _cloned_database_url() -> Optional[str]:
+    """URL of this run's cloned test database, or None when it was not cloned."""
+    url = _clone_test_database(settings.TEST_DATABASE_URL)
+    yield url
+    if url is not None:
+        _drop_test_database(url)
+
+
+@pytest.fixture(scope="session")
+def engine(_cloned_database_url):
+    """Create the test database engine once for the session, with better isolation."""
+    url = _cloned_database_url or settings.TEST_DATABASE_URL
+    if make_url(url).get_dialect().name == "sqlite":
+        # An in-memory SQLite database only exists on a single connection
+        pool_options = {"poolclass": StaticPool}
+    else:
+        # Match the application's QueuePool rather than funnelling every
+        # test through one shared connection
+        pool_options = {
+            "poolclass": QueuePool,
+            "pool_size": int(os.getenv("TEST_DB_POOL_SIZE", "5")),
+            "max_overflow": int(os.getenv("TEST_DB_MAX_OVERFLOW", "10")),
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+    engine = create_engine(url, isolation_level="SERIALIZABLE", **pool_options)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def setup_test_database(engine, _cloned_database_url):
+    """Create test database tables.
+
+    A cloned database arrives with the schema already in place, so the DDL
+    only runs when the configured database is used directly.
+    """
+    if _cloned_database_url is not None:
+        yield
+        return
+
     try:
         # Drop all tables
-        Base.metadata.drop_all(bind=test_engine)
+        Base.metadata.drop_all(bind=engine)
         logger.info("Dropped all existing tables")
 
         # Create all tables directly instead of using Alembic migrations
-        Base.metadata.create_all(bind=test_engine)
+        Base.metadata.create_all(bind=engine)
         logger.info("Created all tables successfully")
 
         yield
 
         # Drop all tables after tests
-        Base.metadata.drop_all(bind=test_engine)
+        Base.metadata.drop_all(bind=engine)
         logger.info("Cleaned up test database")
     except Exception as e:
         logger.error(f"Error setting up test database: {e}")
@@ -179,15 +433,25 @@ def setup_test_database():
 
 
 @pytest.fixture
-def session() -> Session:
-    """Create a new database session for a test."""
-    Base.metadata.create_all(bind=test_engine)
-    session = TestingSessionLocal()
+def session(engine, setup_test_database) -> Session:
+    """Create a new database session for a test.
+
+    The schema is created once by setup_test_database, which only tests that
+    reach this fixture pay for; each test runs inside an outer transaction that
+    is rolled back afterwards, so commits made by the test only release a
+    savepoint.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(
+        bind=connection, join_transaction_mode="create_savepoint"
+    )
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=test_engine)
+        transaction.rollback()
+        connection.close()
 
 
 @pytest.fixture
@@ -197,88 +461,71 @@ def test_db(session: Session):
 
 
 @pytest.fixture
-def db_session():
-    """Create mock database session"""
-    from unittest.mock import MagicMock, PropertyMock
+def db_session(session) -> Session:
+    """Real database session shared by the ORM fixtures and async_client."""
+    return session
 
-    session = MagicMock()
 
-    # Create a mock query builder
-    query = MagicMock()
-    query.filter = MagicMock(return_value=query)
-    query.first = MagicMock(return_value=None)
-    query.all = MagicMock(return_value=[])
-    query.count = MagicMock(return_value=0)
+@pytest.fixture
+def mock_db_session() -> SessionStub:
+    """Create a stub database session for tests that never touch a database."""
+    session = SessionStub()
+    _install_db_session(session)
+    return session
 
-    # Make session.query return the mock query builder
-    type(session).query = PropertyMock(return_value=query)
 
-    return session
+# Session the get_db override hands out to the current test
+_test_db_session: ContextVar[Optional[Session]] = ContextVar(
+    "_test_db_session", default=None
+)
 
 
-@pytest.fixture
-def client(db_session):
-    """Get a test client with database session."""
-
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
+async def _override_get_db():
+    """Single get_db override, registered once instead of a closure per test."""
+    yield _test_db_session.get()
 
 
-@pytest_asyncio.fixture
-async def async_client():
-    """Create async test client"""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client
-
-
-@pytest_asyncio.fixture
-async def test_client():
-    """Create test client"""
-    from starlette.testclient import TestClient
-    from backend.main import app
-
-    client = TestClient(app)
-    yield client
-
-
-@pytest_asyncio.fixture
-async def async_client(db_session) -> AsyncGenerator[httpx.AsyncClient, None]:
-    """Get an async test client with database session."""
-
-    async def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-
-    app.dependency_overrides[get_db] = override_get_db
-    transport = httpx.ASGITransport(
-        app=app
-    )  # @note: ASGI transport for testing FastAPI
-    async with httpx.AsyncClient(
-        transport=transport, base_url="http://test"
-    ) as test_client:
-        # Add WebSocket support
-        test_client.websocket_connect = lambda url, **kwargs: WebSocket(
-            scope={
-                "type": "websocket",
-                "path": url,
-                "query_string": b"",
-                "headers": [],
-                "client": ("127.0.0.1", 8000),
-                "server": ("127.0.0.1", 80),
-            }
-        )
-        yield test_client
+def _install_db_session(session) -> None:
+    """Route get_db to session for the rest of the current test."""
+    _test_db_session.set(session)
+    if app.dependency_overrides.get(get_db) is not _override_get_db:
+        app.dependency_overrides[get_db] = _override_get_db
+
+
+@pytest.fixture(autouse=True)
+def _clear_dependency_overrides():
+    """Drop any dependency overrides a test installed once it finishes."""
+    yield
     app.dependency_overrides.clear()
+    _test_db_session.set(None)
+
+
+@pytest.fixture(scope="session")
+def _async_http_client() -> httpx.AsyncClient:
+    """Share one AsyncClient across the session.
+
+    The ASGI transport calls the app in-process and holds no sockets or
+    event-loop state, so the client can be reused by every test's loop.
+    """
+    test_client = httpx.AsyncClient(
+        # @note: ASGI transport for testing FastAPI
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://test",
+    )
+    yield test_client
+    asyncio.run(test_client.aclose())
+
+
+@pytest.fixture
+def async_client(request, _async_http_client) -> httpx.AsyncClient:
+    """Get an async test client with database session.
+
+    Tests that use mock_db_session get the stub and never open a database
+    transaction; every other test gets the real db_session.
+    """
+    if "mock_db_session" not in request.fixturenames:
+        _install_db_session(request.getfixturevalue("db_session"))
+    return _async_http_client
 
 
 class MockWebSocket:
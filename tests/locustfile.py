@@ -1,7 +1,15 @@
 from locust import HttpUser, task, between
+import itertools
 import random
 
 
+def _deck(items):
+    """Cycle endlessly through a shuffled copy of items."""
+    items = list(items)
+    random.shuffle(items)
+    return itertools.cycle(items)
+
+
 class PeerAIUser(HttpUser):
     # Wait between 1 and 5 seconds between tasks
     wait_time = between(1, 5)
@@ -38,10 +46,17 @@ class PeerAIUser(HttpUser):
             "https://example.com/test-audio/team-discussion.wav",
         ]
 
+        # Per-user shuffled decks so each task only advances an iterator
+        self._text_prompt_deck = _deck(self.text_prompts)
+        self._image_deck = _deck(itertools.product(self.image_urls, self.image_prompts))
+        self._audio_deck = _deck(
+            itertools.product(self.audio_urls, ["transcribe", "analyze"])
+        )
+
     @task(3)
     def test_text_completion(self):
         """Test the text completion endpoint"""
-        prompt = random.choice(self.text_prompts)
+        prompt = next(self._text_prompt_deck)
         payload = {
             "prompt": prompt,
             "max_tokens": 100,
@@ -65,8 +80,7 @@ class PeerAIUser(HttpUser):
     @task(2)
     def test_vision_analysis(self):
         """Test the vision analysis endpoint"""
-        image_url = random.choice(self.image_urls)
-        prompt = random.choice(self.image_prompts)
+        image_url, prompt = next(self._image_deck)
         payload = {
             "image_url": image_url,
             "prompt": prompt,
@@ -87,8 +101,7 @@ class PeerAIUser(HttpUser):
     @task(1)
     def test_audio_processing(self):
         """Test the audio processing endpoint"""
-        audio_url = random.choice(self.audio_urls)
-        task = random.choice(["transcribe", "analyze"])
+        audio_url, task = next(self._audio_deck)
         payload = {
             "audio_url": audio_url,
             "task": task,
@@ -0,0 +1,91 @@
+"""Tests for the admin system settings endpoints."""
+import pytest
+
+from backend.main import settings
+
+SETTINGS_URL = f"{settings.API_V1_PREFIX}/admin/settings"
+
+# What GET returns for conftest's test_settings row; nested fields the row
+# leaves out are filled in from the schema defaults
+EXPECTED_SETTINGS = {
+    "rateLimit": {"enabled": True, "requestsPerMinute": 60, "tokensPerDay": 1000},
+    "security": {
+        "maxTokenLength": 4096,
+        "allowedOrigins": ["https://app.peerdigital.se"],
+    },
+    "models": {
+        "defaultModel": "claude-3-sonnet-20240229",
+        "maxContextLength": 200000,
+        "maxTokens": 1024,
+        "temperature": 0.7,
+    },
+    "monitoring": {"logLevel": "info", "retentionDays": 30, "alertThreshold": 5},
+    "betaFeatures": {
+        "visionEnabled": True,
+        "audioEnabled": True,
+        "visionModel": "claude-3-opus-20240229",
+        "audioModel": "whisper-1",
+    },
+}
+
+UPDATED_SETTINGS = {
+    "rateLimit": {"enabled": False, "requestsPerMinute": 30, "tokensPerDay": 5000},
+    "security": {
+        "maxTokenLength": 2048,
+        # Comma-separated origins are normalised to a list
+        "allowedOrigins": "https://a.example, https://b.example",
+    },
+    "models": {
+        "defaultModel": "mistral-small-latest",
+        "maxContextLength": 32768,
+        "maxTokens": 512,
+        "temperature": 0.2,
+    },
+    "monitoring": {"logLevel": "debug", "retentionDays": 7, "alertThreshold": 2},
+    "betaFeatures": {
+        "visionEnabled": False,
+        "audioEnabled": True,
+        "visionModel": "claude-3-opus-20240229",
+        "audioModel": "whisper-1",
+    },
+}
+
+EXPECTED_UPDATED_SETTINGS = {
+    **UPDATED_SETTINGS,
+    "security": {
+        "maxTokenLength": 2048,
+        "allowedOrigins": ["https://a.example", "https://b.example"],
+    },
+}
+
+
+@pytest.fixture
+def admin_headers(admin_token):
+    """Authorization headers for the super admin from conftest"""
+    return {"Authorization": f"Bearer {admin_token}"}
+
+
+@pytest.mark.usefixtures("test_settings")
+async def test_get_settings(admin_headers, async_client):
+    """Test reading the stored settings"""
+    response = await async_client.get(SETTINGS_URL, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == EXPECTED_SETTINGS
+
+
+@pytest.mark.usefixtures("test_settings")
+async def test_update_settings(admin_headers, async_client):
+    """Test replacing the settings returns and stores the new values"""
+    response = await async_client.put(
+        SETTINGS_URL, headers=admin_headers, json=UPDATED_SETTINGS
+    )
+
+    assert response.status_code == 200
+    assert response.json() == EXPECTED_UPDATED_SETTINGS
+
+    # A fresh read sees the updated row
+    response = await async_client.get(SETTINGS_URL, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json() == EXPECTED_UPDATED_SETTINGS
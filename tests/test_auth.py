@@ -1,86 +1,85 @@
+import functools
+import itertools
 import pytest
-from unittest.mock import MagicMock
 from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException
 from jose import jwt
 
-from backend.main import app
-from backend.database import get_db
 from backend.models.auth import User, APIKey
-from backend.core.security import get_password_hash
 from sqlalchemy.orm import Session
 from backend.core.roles import Role  # Import Role enum
 
 from backend.main import settings
-from backend.routes.auth import ALGORITHM, JWT_SECRET_KEY
+from backend.routes.auth import ALGORITHM, JWT_SECRET_KEY, get_current_user
 
+# Auth endpoint URLs, built once at import
+REGISTER_URL = f"{settings.API_V1_PREFIX}/auth/register"
+LOGIN_URL = f"{settings.API_V1_PREFIX}/auth/login"
+VALIDATE_URL = f"{settings.API_V1_PREFIX}/auth/validate"
+LOGOUT_URL = f"{settings.API_V1_PREFIX}/auth/logout"
+API_KEYS_URL = f"{settings.API_V1_PREFIX}/auth/api-keys"
 
-# Mock database session
-@pytest.fixture
-def db_session():
-    """Create a mock database session"""
-    session = MagicMock()
+# Clock and email sequence fixed at import; test data never depends on wall time
+_NOW = datetime.utcnow()
+_EXPIRES = _NOW + timedelta(days=30)
+_EMAIL_SEQ = itertools.count()
 
-    def get_test_db():
-        try:
-            yield session
-        finally:
-            session.close()
+# Login form for the user created by the test_db fixture
+_LOGIN_FORM = {"username": "test@peerai.se", "password": "test123"}
 
-    app.dependency_overrides[get_db] = get_test_db
-    return session
 
+@functools.lru_cache(maxsize=256)
+def _make_token(sub: str, exp: Optional[datetime] = None) -> str:
+    """Sign a bearer token, once per (sub, exp) for the whole run."""
+    payload = {"sub": sub} if exp is None else {"sub": sub, "exp": exp}
+    return jwt.encode(payload, JWT_SECRET_KEY, algorithm=ALGORITHM)
 
-@pytest.fixture
-def test_user():
-    """
-    Create a test user
-    
-    Note: To create a superuser, set role=Role.SUPER_ADMIN
-    The is_superuser property is READ-ONLY and computed from the role field.
-    """
-    return User(
-        id=1,
-        email="test@example.com",
-        hashed_password="$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewKyNiGpJ4vZKkOS",  # Password: test123
-        full_name="Test User",
-        is_active=True,
-        # To create a superuser: role=Role.SUPER_ADMIN
-    )
 
+# Token for mock_user that expired long ago, signed once at import
+EXPIRED_TOKEN = _make_token("test@example.com", datetime(2020, 1, 1))
 
-@pytest.fixture
-def test_api_key():
-    """Create a test API key"""
-    return APIKey(id=1, key="test_key_123", name="Test Key", user_id=1, is_active=True)
+
+@pytest.fixture(scope="session")
+def auth_token():
+    """Bearer token for mock_user, signed once per session"""
+    return _make_token("test@example.com")
+
+
+@pytest.fixture(scope="session")
+def auth_headers(auth_token):
+    """Authorization headers for mock_user"""
+    return {"Authorization": f"Bearer {auth_token}"}
+
+
+@pytest.fixture(scope="session")
+def db_auth_headers():
+    """Authorization headers for the user test_db inserts, without a login round-trip"""
+    return {"Authorization": f"Bearer {_make_token('test@peerai.se')}"}
 
 
 @pytest.fixture
-def test_db(session: Session):
+def test_db(session: Session, test_password_hash):
     """Fixture for test database session"""
     # Create test user
-    hashed_password = get_password_hash("test123")
     test_user = User(
-        email="test@peerai.se", hashed_password=hashed_password, is_active=True
+        email="test@peerai.se", hashed_password=test_password_hash, is_active=True
     )
     session.add(test_user)
+    # Only releases a SAVEPOINT; the session fixture rolls everything back
     session.commit()
 
-    yield session
-
-    # Cleanup - first delete API keys, then users
-    session.query(APIKey).delete()
-    session.query(User).delete()
-    session.commit()
+    return session
 
 
-@pytest.mark.asyncio
-async def test_register_user_success(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+async def test_register_user_success(async_client):
     """Test successful user registration"""
     # Use a unique email that doesn't exist in the database
-    unique_email = f"new_user_{datetime.utcnow().timestamp()}@example.com"
-    
+    unique_email = f"new_user_{next(_EMAIL_SEQ)}@example.com"
+
     response = await async_client.post(
-        f"{settings.API_V1_PREFIX}/auth/register",
+        REGISTER_URL,
         json={
             "email": unique_email,
             "password": "newpass123",
@@ -99,13 +98,13 @@ async def test_register_user_success(test_db, async_client):
     assert payload["sub"] == unique_email
 
 
-@pytest.mark.asyncio
-async def test_register_user_duplicate_email(db_session, test_user, async_client):
+@pytest.mark.xdist_group("auth_mock")
+async def test_register_user_duplicate_email(mock_db_session, mock_user, async_client):
     """Test registration with existing email"""
-    db_session.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db_session.register(User, mock_user)
 
     response = await async_client.post(
-        f"{settings.API_V1_PREFIX}/auth/register",
+        REGISTER_URL,
         json={
             "email": "test@example.com",
             "password": "test123",
@@ -117,76 +116,62 @@ async def test_register_user_duplicate_email(db_session, test_user, async_client
     assert response.json()["detail"] == "Email already registered"
 
 
-@pytest.mark.asyncio
-async def test_login_success(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_login_success(async_client):
     """Test successful login"""
     response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
+        LOGIN_URL,
+        data=_LOGIN_FORM,
     )
     assert response.status_code == 200
-    assert "access_token" in response.json()
-    assert "token_type" in response.json()
-    assert response.json()["token_type"] == "bearer"
+    data = response.json()
+    assert "access_token" in data
+    assert "token_type" in data
+    assert data["token_type"] == "bearer"
 
 
-@pytest.mark.asyncio
-async def test_login_invalid_credentials(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_login_invalid_credentials(async_client):
     """Test login with invalid credentials"""
     response = await async_client.post(
-        "/api/v1/auth/login",
+        LOGIN_URL,
         data={"username": "test@peerai.se", "password": "wrongpass"},
     )
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect email or password"
 
 
-@pytest.mark.asyncio
-async def test_validate_token(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_validate_token(db_auth_headers, async_client):
     """Test token validation"""
-    # First login to get token
-    login_response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
-    )
-    token = login_response.json()["access_token"]
-
-    # Test token validation
-    response = await async_client.get(
-        "/api/v1/auth/validate", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = await async_client.get(VALIDATE_URL, headers=db_auth_headers)
     assert response.status_code == 200
     assert response.json()["email"] == "test@peerai.se"
 
 
-@pytest.mark.asyncio
-async def test_logout(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_logout(db_auth_headers, async_client):
     """Test logout endpoint"""
-    # First login to get token
-    login_response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
-    )
-    token = login_response.json()["access_token"]
-
-    # Test logout
-    response = await async_client.post(
-        "/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"}
-    )
+    response = await async_client.post(LOGOUT_URL, headers=db_auth_headers)
     assert response.status_code == 200
     assert response.json()["message"] == "Successfully logged out"
 
 
-@pytest.mark.asyncio
-async def test_create_api_key_success(db_session, test_user, async_client):
+@pytest.mark.xdist_group("auth_mock")
+async def test_create_api_key_success(
+    mock_db_session, mock_user, auth_headers, async_client
+):
     """Test successful API key creation"""
     # Mock authentication
-    token = jwt.encode({"sub": test_user.email}, JWT_SECRET_KEY, algorithm=ALGORITHM)
-    db_session.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db_session.register(User, mock_user)
 
     response = await async_client.post(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
+        API_KEYS_URL,
+        headers=auth_headers,
         json={"name": "New Key", "expires_in_days": 30},
     )
 
@@ -197,15 +182,16 @@ async def test_create_api_key_success(db_session, test_user, async_client):
     assert "expires_at" in data
 
 
-@pytest.mark.asyncio
-async def test_create_api_key_no_expiry(db_session, test_user, async_client):
+@pytest.mark.xdist_group("auth_mock")
+async def test_create_api_key_no_expiry(
+    mock_db_session, mock_user, auth_headers, async_client
+):
     """Test API key creation without expiry"""
-    token = jwt.encode({"sub": test_user.email}, JWT_SECRET_KEY, algorithm=ALGORITHM)
-    db_session.query.return_value.filter.return_value.first.return_value = test_user
+    mock_db_session.register(User, mock_user)
 
     response = await async_client.post(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
+        API_KEYS_URL,
+        headers=auth_headers,
         json={"name": "Permanent Key"},
     )
 
@@ -214,23 +200,17 @@ async def test_create_api_key_no_expiry(db_session, test_user, async_client):
     assert data["expires_at"] is None
 
 
-@pytest.mark.asyncio
-async def test_list_api_keys(test_db, test_user, async_client):
+@pytest.mark.xdist_group("auth_db")
+async def test_list_api_keys(test_db, db_auth_headers, async_client):
     """Test listing API keys"""
-    # First login to get token
-    login_response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
-    )
-    token = login_response.json()["access_token"]
-    
-    # Create a test API key
+    # Create a test API key for the user test_db inserted
+    user = test_db.query(User).filter(User.email == "test@peerai.se").one()
     api_key = APIKey(
         key="test_key_123",
         name="Test Key",
-        user_id=test_user.id,
+        user_id=user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_EXPIRES,
         daily_limit=1000,
         minute_limit=60,
     )
@@ -238,8 +218,8 @@ async def test_list_api_keys(test_db, test_user, async_client):
     test_db.commit()
 
     response = await async_client.get(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
+        API_KEYS_URL,
+        headers=db_auth_headers,
     )
 
     assert response.status_code == 200
@@ -249,94 +229,73 @@ async def test_list_api_keys(test_db, test_user, async_client):
     assert data[0]["key"] == "test_key_123"
 
 
-@pytest.mark.asyncio
-async def test_delete_api_key_success(test_db, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_delete_api_key_success(db_auth_headers, async_client):
     """Test successful API key deletion"""
-    # First login to get token
-    login_response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
-    )
-    token = login_response.json()["access_token"]
-    
     # Create a test API key using the API
     create_response = await async_client.post(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
+        API_KEYS_URL,
+        headers=db_auth_headers,
         json={"name": "Test Key To Delete", "expires_in_days": 30},
     )
     assert create_response.status_code == 200
     print(f"Create API key response: {create_response.json()}")
-    
+
     # List API keys to get the ID
     list_response = await async_client.get(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
+        API_KEYS_URL,
+        headers=db_auth_headers,
     )
     assert list_response.status_code == 200
     api_keys = list_response.json()
     print(f"API keys for user: {api_keys}")
-    
+
     # Find the API key we just created
     api_key = next((k for k in api_keys if k["name"] == "Test Key To Delete"), None)
     assert api_key is not None, "Could not find the API key we just created"
     key_id = api_key["id"]
-    
+
     # Delete the API key
     response = await async_client.delete(
-        f"{settings.API_V1_PREFIX}/auth/api-keys/{key_id}",
-        headers={"Authorization": f"Bearer {token}"},
+        f"{API_KEYS_URL}/{key_id}",
+        headers=db_auth_headers,
     )
-    
+
     print(f"Delete response: {response.status_code} - {response.text}")
 
     assert response.status_code == 200
     assert response.json()["status"] == "success"
 
 
-@pytest.mark.asyncio
-async def test_delete_api_key_not_found(test_db, test_user, async_client):
+@pytest.mark.xdist_group("auth_db")
+@pytest.mark.usefixtures("test_db")
+async def test_delete_api_key_not_found(db_auth_headers, async_client):
     """Test deleting non-existent API key"""
-    # First login to get token
-    login_response = await async_client.post(
-        "/api/v1/auth/login",
-        data={"username": "test@peerai.se", "password": "test123"},
-    )
-    token = login_response.json()["access_token"]
-
     # Use a non-existent key ID
     response = await async_client.delete(
-        f"{settings.API_V1_PREFIX}/auth/api-keys/999",
-        headers={"Authorization": f"Bearer {token}"},
+        f"{API_KEYS_URL}/999",
+        headers=db_auth_headers,
     )
 
     assert response.status_code == 404
     assert response.json()["detail"] == "API key not found"
 
 
-@pytest.mark.asyncio
-async def test_invalid_token(db_session, async_client):
-    """Test accessing protected endpoint with invalid token"""
-    response = await async_client.get(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": "Bearer invalid_token"},
-    )
-    assert response.status_code == 401
-    assert response.json()["detail"] == "Could not validate credentials"
-
+@pytest.mark.xdist_group("auth_mock")
+async def test_invalid_token(mock_db_session):
+    """Test the auth dependency rejects an invalid token"""
+    # Call the dependency directly; routing adds nothing to a JWT decode failure
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user("invalid_token", mock_db_session)
+    assert exc_info.value.status_code == 401
+    assert exc_info.value.detail == "Could not validate credentials"
 
-@pytest.mark.asyncio
-async def test_expired_token(db_session, test_user, async_client):
-    """Test accessing protected endpoint with expired token"""
-    # Create an expired token
-    expired_time = datetime.utcnow() - timedelta(days=1)
-    token = jwt.encode(
-        {"sub": test_user.email, "exp": expired_time}, JWT_SECRET_KEY, algorithm=ALGORITHM
-    )
 
-    response = await async_client.get(
-        f"{settings.API_V1_PREFIX}/auth/api-keys",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    assert response.status_code == 401
-    assert response.json()["detail"] == "Could not validate credentials"
+@pytest.mark.xdist_group("auth_mock")
+async def test_expired_token(mock_db_session):
+    """Test the auth dependency rejects an expired token"""
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(EXPIRED_TOKEN, mock_db_session)
+    assert exc_info.value.status_code == 401
+    assert exc_info.value.detail == "Could not validate credentials"
@@ -1,108 +1,63 @@
 """Basic functionality tests for the backend."""
 import pytest
-from unittest.mock import MagicMock
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from backend.models.auth import User, APIKey, Role
-from backend.core.security import get_password_hash
+from backend.models.auth import User, Role
 
-
-@pytest.fixture
-def mock_db_session():
-    """Create a mock database session"""
-    session = MagicMock()
-    
-    # Create a mock query builder
-    query = MagicMock()
-    query.filter = MagicMock(return_value=query)
-    query.first = MagicMock(return_value=None)
-    query.all = MagicMock(return_value=[])
-    
-    # Make session.query return the mock query builder
-    session.query = MagicMock(return_value=query)
-    
-    return session
+# Clock read once per module
+_NOW = datetime.utcnow()
 
 
-@pytest.fixture
-def test_user():
-    """Create a test user"""
-    return User(
-        id=1,
-        email="test@example.com",
-        hashed_password=get_password_hash("test123"),
-        full_name="Test User",
-        is_active=True,
-        role=Role.USER
-    )
-
-
-@pytest.fixture
-def test_admin_user():
-    """Create a test admin user"""
+@pytest.fixture(scope="module")
+def test_admin_user(test_password_hash):
+    """Create a test admin user, shared by the read-only model tests"""
     return User(
         id=2,
         email="admin@example.com",
-        hashed_password=get_password_hash("admin123"),
+        hashed_password=test_password_hash,
         full_name="Admin User",
         is_active=True,
         role=Role.SUPER_ADMIN
     )
 
 
-@pytest.fixture
-def test_api_key(test_user):
-    """Create a test API key"""
-    return APIKey(
-        id=1,
-        key="test_key_123",
-        name="Test Key",
-        user_id=test_user.id,
-        is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
-        daily_limit=1000,
-        minute_limit=60
-    )
-
-
-def test_user_model_properties(test_user, test_admin_user):
+def test_user_model_properties(mock_user, test_admin_user):
     """Test User model properties"""
     # Regular user should not be a superuser
-    assert test_user.is_superuser is False
+    assert mock_user.is_superuser is False
     
     # Admin user should be a superuser
     assert test_admin_user.is_superuser is True
     
     # Test other properties
-    assert test_user.email == "test@example.com"
-    assert test_user.full_name == "Test User"
-    assert test_user.is_active is True
+    assert mock_user.email == "test@example.com"
+    assert mock_user.full_name == "Test User"
+    assert mock_user.is_active is True
 
 
-def test_api_key_model(test_api_key):
+def test_api_key_model(mock_api_key):
     """Test APIKey model"""
-    assert test_api_key.key == "test_key_123"
-    assert test_api_key.name == "Test Key"
-    assert test_api_key.is_active is True
-    assert test_api_key.daily_limit == 1000
-    assert test_api_key.minute_limit == 60
+    assert mock_api_key.key == "test_key_123"
+    assert mock_api_key.name == "Test Key"
+    assert mock_api_key.is_active is True
+    assert mock_api_key.daily_limit == 1000
+    assert mock_api_key.minute_limit == 60
     
     # Test that the API key expires in the future
-    assert test_api_key.expires_at > datetime.utcnow()
+    assert mock_api_key.expires_at > _NOW
 
 
-@pytest.mark.asyncio
-async def test_basic_auth_flow(test_user):
+async def test_basic_auth_flow(mock_user):
     """Test basic authentication flow with direct model validation"""
     # Instead of testing the actual API endpoint, we'll just test the model
     # This avoids issues with the async_client and mock_db_session
     
     # Verify user credentials
-    assert test_user.email == "test@example.com"
-    assert test_user.is_active is True
+    assert mock_user.email == "test@example.com"
+    assert mock_user.is_active is True
     
     # Test the is_superuser property
-    assert test_user.is_superuser is False
+    assert mock_user.is_superuser is False
     
     # Verify that the role is set correctly
-    assert test_user.role == Role.USER 
\ No newline at end of file
+    assert mock_user.role == Role.USER 
\ No newline at end of file
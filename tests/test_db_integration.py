@@ -1,44 +1,22 @@
 import pytest
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import delete, insert, update
 
-from backend.database import Base, engine
 from backend.models.auth import User
 from backend.models.auth import APIKey
-from backend.core.security import get_password_hash
-from backend.config import settings
 from backend.core.roles import Role  # Import Role enum
 
-# Use the configured test database URL
-TEST_DATABASE_URL = settings.TEST_DATABASE_URL
+# Real database round-trips; skipped unless pytest is run with --run-slow
+pytestmark = pytest.mark.slow
 
-
-@pytest.fixture(scope="function")
-def engine():
-    """Create a test database engine"""
-    engine = create_engine(
-        TEST_DATABASE_URL,
-        # Remove SQLite-specific arguments
-        poolclass=StaticPool,
-    )
-    Base.metadata.create_all(bind=engine)
-    yield engine
-    Base.metadata.drop_all(bind=engine)
+# One clock reading per module keeps expiry comparisons deterministic
+_NOW = datetime.utcnow()
+_PLUS_30 = _NOW + timedelta(days=30)
+_MINUS_1 = _NOW - timedelta(days=1)
 
 
 @pytest.fixture(scope="function")
-def db_session(engine):
-    """Create a test database session"""
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    yield session
-    session.close()
-
-
-@pytest.fixture(scope="function")
-def test_user(db_session):
+def test_user(db_session, test_password_hash):
     """
     Create a test user
     
@@ -47,14 +25,13 @@ def test_user(db_session):
     """
     user = User(
         email="test@peerai.se",
-        hashed_password=get_password_hash("testpass123"),
+        hashed_password=test_password_hash,
         full_name="Test User",
         is_active=True,
         # To create a superuser: role=Role.SUPER_ADMIN
     )
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    db_session.flush()
     return user
 
 
@@ -66,25 +43,24 @@ def test_api_key(db_session, test_user):
         name="Test Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
     db_session.add(api_key)
-    db_session.commit()
-    db_session.refresh(api_key)
+    db_session.flush()
     return api_key
 
 
-def test_create_user(db_session):
+def test_create_user(db_session, test_password_hash):
     """Test user creation"""
     user = User(
         email="new@peerai.se",
-        hashed_password=get_password_hash("newpass123"),
+        hashed_password=test_password_hash,
         full_name="New User",
         is_active=True,
     )
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    # The primary key comes back from the INSERT; no need to re-read the row
+    db_session.flush()
 
     assert user.id is not None
     assert user.email == "new@peerai.se"
@@ -96,8 +72,9 @@ def test_update_user(db_session, test_user):
     """Test user update"""
     test_user.full_name = "Updated Name"
     test_user.is_active = False
-    db_session.commit()
-    db_session.refresh(test_user)
+    db_session.flush()
+    # Expire so the assertions reload the row and prove the UPDATE landed
+    db_session.expire(test_user)
 
     assert test_user.full_name == "Updated Name"
     assert test_user.is_active is False
@@ -120,11 +97,10 @@ def test_create_api_key(db_session, test_user):
         name="New Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
     db_session.add(api_key)
-    db_session.commit()
-    db_session.refresh(api_key)
+    db_session.flush()
 
     assert api_key.id is not None
     assert api_key.key == "new_key_456"
@@ -135,8 +111,8 @@ def test_create_api_key(db_session, test_user):
 def test_deactivate_api_key(db_session, test_api_key):
     """Test API key deactivation"""
     test_api_key.is_active = False
-    db_session.commit()
-    db_session.refresh(test_api_key)
+    db_session.flush()
+    db_session.expire(test_api_key)
 
     assert test_api_key.is_active is False
 
@@ -158,7 +134,8 @@ def test_cascade_delete_api_keys(db_session, test_user, test_api_key):
     assert deleted_key is None
 
 
-def test_user_relationships(db_session, test_user, test_api_key):
+@pytest.mark.usefixtures("test_api_key")
+def test_user_relationships(db_session, test_user):
     """Test user relationships"""
     # Test user.api_keys relationship
     assert len(test_user.api_keys) == 1
@@ -170,11 +147,11 @@ def test_user_relationships(db_session, test_user, test_api_key):
         name="Another Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
     db_session.add(new_key)
-    db_session.commit()
-    db_session.refresh(test_user)
+    db_session.flush()
+    db_session.expire_all()
 
     assert len(test_user.api_keys) == 2
 
@@ -187,10 +164,8 @@ def test_api_key_expiration(db_session, test_user):
         name="Expired Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() - timedelta(days=1),
+        expires_at=_MINUS_1,
     )
-    db_session.add(expired_key)
-    db_session.commit()
 
     # Create active key
     active_key = APIKey(
@@ -198,10 +173,11 @@ def test_api_key_expiration(db_session, test_user):
         name="Active Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
-    db_session.add(active_key)
-    db_session.commit()
+    # One flush writes both keys; the rollback fixture discards them afterwards
+    db_session.add_all([expired_key, active_key])
+    db_session.flush()
 
     # Query active keys
     active_keys = (
@@ -209,7 +185,7 @@ def test_api_key_expiration(db_session, test_user):
         .filter(
             APIKey.user_id == test_user.id,
             APIKey.is_active == True,
-            APIKey.expires_at > datetime.utcnow(),
+            APIKey.expires_at > _NOW,
         )
         .all()
     )
@@ -218,27 +194,27 @@ def test_api_key_expiration(db_session, test_user):
     assert active_keys[0].key == "active_key_111"
 
 
-def test_unique_constraints(db_session, test_user):
+def test_unique_constraints(db_session, test_user, test_password_hash):
     """Test unique constraints"""
     from sqlalchemy.exc import IntegrityError
     from backend.models.auth import User, APIKey
-    from backend.core.security import get_password_hash
-    from datetime import datetime, timedelta
 
     # Try to create user with duplicate email
     duplicate_user = User(
         email=test_user.email,  # Same as test_user
-        hashed_password=get_password_hash("pass123"),
+        hashed_password=test_password_hash,
         full_name="Duplicate User",
         is_active=True,
     )
-    db_session.add(duplicate_user)
 
+    # The SAVEPOINT confines the failed INSERT; test_user and the outer
+    # transaction survive without a full rollback
     with pytest.raises(
         IntegrityError, match="duplicate key value violates unique constraint"
     ):
-        db_session.flush()
-    db_session.rollback()
+        with db_session.begin_nested():
+            db_session.add(duplicate_user)
+            db_session.flush()
 
     # Try to create API key with duplicate key
     api_key = APIKey(
@@ -246,7 +222,7 @@ def test_unique_constraints(db_session, test_user):
         name="Test Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
     db_session.add(api_key)
     db_session.flush()
@@ -256,47 +232,48 @@ def test_unique_constraints(db_session, test_user):
         name="Duplicate Key",
         user_id=test_user.id,
         is_active=True,
-        expires_at=datetime.utcnow() + timedelta(days=30),
+        expires_at=_PLUS_30,
     )
-    db_session.add(duplicate_key)
 
     with pytest.raises(
         IntegrityError, match="duplicate key value violates unique constraint"
     ):
-        db_session.flush()
-    db_session.rollback()
+        with db_session.begin_nested():
+            db_session.add(duplicate_key)
+            db_session.flush()
 
 
-def test_bulk_operations(db_session):
+def test_bulk_operations(db_session, test_password_hash):
     """Test bulk database operations"""
-    # Bulk insert users
-    users = [
-        User(
-            email=f"user{i}@peerai.se",
-            hashed_password=get_password_hash(f"pass{i}"),
-            full_name=f"User {i}",
-            is_active=True,
-        )
-        for i in range(5)
-    ]
-    db_session.bulk_save_objects(users)
-    db_session.commit()
+    # Bulk insert users in one executemany INSERT against the Core table,
+    # bypassing the ORM bulk path; bulk statements execute immediately, so
+    # the counts below see them without committing
+    db_session.execute(
+        insert(User.__table__),
+        [
+            {
+                "email": f"user{i}@peerai.se",
+                "hashed_password": test_password_hash,
+                "full_name": f"User {i}",
+                "is_active": True,
+            }
+            for i in range(5)
+        ],
+    )
 
     # Verify users were created
     user_count = db_session.query(User).count()
     assert user_count == 5
 
     # Bulk update
-    db_session.query(User).update({User.is_active: False})
-    db_session.commit()
+    db_session.execute(update(User).values(is_active=False))
 
     # Verify update
     inactive_count = db_session.query(User).filter(User.is_active == False).count()
     assert inactive_count == 5
 
     # Bulk delete
-    db_session.query(User).delete()
-    db_session.commit()
+    db_session.execute(delete(User))
 
     # Verify deletion
     final_count = db_session.query(User).count()